@@ -1,8 +1,22 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+from selectolax.lexbor import LexborHTMLParser
+import asyncio
+import atexit
+import codecs
 import datetime
+import hashlib
 import logging
+import logging.handlers
 import os
+import queue
+import re
+import shelve
+import string
+import tempfile
+import threading
 
 import gradio as gr
 
@@ -14,220 +28,545 @@ except ImportError:
     print("Please install or verify Ollama to proceed.")
     raise
 
+# A single async client is shared by every request so its underlying
+# HTTP connection pool to the Ollama server is reused. The host comes from
+# OLLAMA_HOST as usual.
+OLLAMA_CLIENT = ollama.AsyncClient()
+
+# How long the Ollama server keeps the model loaded after a request, so it
+# is not unloaded and reloaded between the calls of a batch
+OLLAMA_KEEP_ALIVE = '10m'
+
+# Number of (company, website) rows offered in the interface
+MAX_COMPANIES = 12
+
+# Maximum number of companies processed at the same time, to cap the load
+# placed on the Ollama server.
+MAX_CONCURRENT_COMPANIES = 4
+
 # ------------------------------------------------------------------------------
 # 1. Configure Logging
 # ------------------------------------------------------------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
+# Log calls only enqueue the record; a background listener thread does the
+# actual writing to the file and console, off the request path.
+def configure_logging():
+    """
+    Routes the root logger through a QueueHandler and starts the QueueListener.
+    Like `logging.basicConfig`, does nothing if this was already done in the
+    process (e.g. the module is re-run by Gradio's reload mode), so handlers
+    and listener threads are not duplicated. Returns the listener, or None.
+    """
+    root = logging.getLogger()
+    if any(isinstance(h, logging.handlers.QueueHandler) for h in root.handlers):
+        return None
+
+    log_formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
+    log_handlers = [
         logging.FileHandler("tmsa_app.log"),  # Log to a file
         logging.StreamHandler()               # Log to console
     ]
-)
+    for handler in log_handlers:
+        handler.setFormatter(log_formatter)
+
+    log_queue = queue.Queue(-1)
+    root.setLevel(logging.INFO)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    listener = logging.handlers.QueueListener(log_queue, *log_handlers)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+LOG_LISTENER = configure_logging()
 
 # ------------------------------------------------------------------------------
 # 2. Function to Extract Text from Homepage
 # ------------------------------------------------------------------------------
-def extract_text_from_url(url):
+# A shared session keeps connections alive and pooled across homepage requests,
+# instead of paying a fresh TCP/TLS handshake for every URL.
+# ACCEPT_ENCODING is urllib3's list of encodings it can decode ("gzip,deflate",
+# plus "br" when brotli is installed).
+SESSION = requests.Session()
+SESSION.headers.update({
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'User-Agent': 'Mozilla/5.0 (compatible; TMSA-Spotlight/1.0)',
+})
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.3),
+)
+SESSION.mount('https://', _adapter)
+SESSION.mount('http://', _adapter)
+
+# Separate (connect, read) timeouts in seconds
+REQUEST_TIMEOUT = (3, 10)
+
+# Only the first part of a homepage is downloaded; the text we need is
+# near the top and some pages are megabytes of inline scripts
+MAX_HTML_BYTES = 512 * 1024
+HTML_CHUNK_SIZE = 16 * 1024
+
+# Tags we extract text from (paragraphs, headings)
+TEXT_TAGS_SELECTOR = 'p, h1, h2, h3, h4, h5, h6'
+
+# Homepage text sent to the LLM is truncated to this many characters
+HOMEPAGE_CONTEXT_CHARS = 1500
+
+# Extracted homepage text is cached on disk per URL together with the page's
+# ETag/Last-Modified validators. A rerun sends a conditional request, and a
+# 304 Not Modified reply reuses the cached text without downloading or
+# parsing the page again. The shelf is shared by worker threads, hence the lock.
+CACHE_DIR = "cache"
+os.makedirs(CACHE_DIR, exist_ok=True)
+PAGE_CACHE = shelve.open(os.path.join(CACHE_DIR, "pages.db"))
+PAGE_CACHE_LOCK = threading.Lock()
+atexit.register(PAGE_CACHE.close)
+
+def parse_html(content, headers):
     """
-    Retrieves the homepage HTML using `requests` and parse text via BeautifulSoup.
-    Returns the extracted text or None if there's an error.
+    Parses raw HTML bytes without going through `response.text` and its charset detection.
+    Uses the charset declared in the Content-Type header if any; otherwise the
+    parser detects it from a byte-order mark or <meta> tag.
     """
+    content_type = headers.get('Content-Type', '')
+    charset = None
+    if 'charset=' in content_type.lower():
+        charset = requests.utils.get_encoding_from_headers(headers)
+
+    if charset:
+        try:
+            if codecs.lookup(charset).name == 'utf-8':
+                # The parser reads bytes as UTF-8 natively
+                return LexborHTMLParser(content)
+            return LexborHTMLParser(content.decode(charset, errors='replace'))
+        except LookupError:
+            logging.warning(f"Unknown charset {charset!r}; detecting it from the page instead.")
+    return LexborHTMLParser(content, encoding=True)
+
+def extract_text_from_url(url, max_chars=HOMEPAGE_CONTEXT_CHARS):
+    """
+    Retrieves up to MAX_HTML_BYTES of homepage HTML using the shared `requests` session and parse text via selectolax.
+    Returns at most `max_chars` characters of extracted text, or None if there's an error.
+    Unchanged pages are served from PAGE_CACHE via a conditional request.
+    """
+    with PAGE_CACHE_LOCK:
+        cached = PAGE_CACHE.get(url)
+    if cached is not None and cached['max_chars'] != max_chars:
+        cached = None
+
+    # Ask the server to skip the body if the page is unchanged since it was cached
+    headers = {}
+    if cached is not None:
+        if cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        with SESSION.get(url, headers=headers, timeout=REQUEST_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            if response.status_code == 304 and cached is not None:
+                logging.info(f"{url} not modified; using cached text.")
+                return cached['text']
+            response_headers = response.headers
+            etag = response_headers.get('ETag')
+            last_modified = response_headers.get('Last-Modified')
+
+            # Read (decompressed) chunks until MAX_HTML_BYTES
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(HTML_CHUNK_SIZE):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= MAX_HTML_BYTES:
+                    break
     except requests.exceptions.RequestException as e:
         logging.error(f"Failed to retrieve {url}: {e}")
         return None
 
-    soup = BeautifulSoup(response.text, 'html.parser')
+    tree = parse_html(b"".join(chunks)[:MAX_HTML_BYTES], response_headers)
 
-    # Gather text from relevant tags (paragraphs, headings)
-    text_elements = soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-    extracted_text = "\n".join([elem.get_text(strip=True) for elem in text_elements])
+    # Gather text from relevant tags, stopping once we have `max_chars`
+    parts = []
+    length = 0
+    for node in tree.css(TEXT_TAGS_SELECTOR):
+        text = node.text(strip=True)
+        if text:
+            parts.append(text)
+            length += len(text) + 1
+            if length >= max_chars:
+                break
+    extracted_text = "\n".join(parts)[:max_chars]
 
     if not extracted_text.strip():
         logging.warning(f"No meaningful text extracted from {url}.")
+
+    # Without a validator the entry could never be revalidated, so skip it
+    if etag or last_modified:
+        with PAGE_CACHE_LOCK:
+            PAGE_CACHE[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'max_chars': max_chars,
+                'text': extracted_text,
+            }
+            PAGE_CACHE.sync()
     return extracted_text
 
 # ------------------------------------------------------------------------------
 # 3. Function to Generate a Post via Ollama
 # ------------------------------------------------------------------------------
-def generate_post(desiredModel, prompt):
+# Set LLM_CACHE=1 to reuse earlier replies for an identical (model, prompt).
+# Leave it off when you want fresh, non-deterministic posts on every run.
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE") == "1"
+LLM_CACHE_DIR = CACHE_DIR
+
+def _llm_cache_path(desiredModel, prompt):
+    """
+    Returns the cache file path for a (model, prompt) pair.
+    """
+    key = hashlib.sha256(f"{desiredModel}\x00{prompt}".encode("utf-8")).hexdigest()
+    return os.path.join(LLM_CACHE_DIR, f"{key}.txt")
+
+def read_cached_post(desiredModel, prompt):
+    """
+    Returns the cached reply for this model and prompt, or None on a miss.
+    """
+    try:
+        with open(_llm_cache_path(desiredModel, prompt), "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def write_cached_post(desiredModel, prompt, text):
+    """
+    Stores a reply in the cache. The file is written to a temporary name and
+    moved into place so readers never see a partial entry.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=LLM_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, _llm_cache_path(desiredModel, prompt))
+    except OSError as e:
+        logging.warning(f"Could not write LLM cache entry: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+async def generate_post_async(client, desiredModel, prompt, out=None):
     """
-    Calls Ollama's Llama model with the given prompt.
-    Returns the response text or an error message if something goes wrong.
+    Calls Ollama's Llama model with the given prompt through the async client, streaming the reply.
+    If `out` is a writable file, each token is written to it as soon as it arrives.
+    When LLM_CACHE is enabled, a previous reply for the same model and prompt is returned instead.
+    Returns the response text, or None if the request fails.
     """
+    if LLM_CACHE_ENABLED:
+        cached = read_cached_post(desiredModel, prompt)
+        if cached is not None:
+            logging.info("Using cached LLM reply.")
+            if out is not None:
+                out.write(cached)
+            return cached
+
     try:
-        response = ollama.chat(model=desiredModel, messages=[
+        stream = await client.chat(model=desiredModel, messages=[
             {
                 'role': 'user',
                 'content': prompt,
             },
-        ])
-        # Ollama's latest response format example:
-        # response['message']['content'] holds the LLM reply
-        return response['message']['content']
+        ], stream=True, keep_alive=OLLAMA_KEEP_ALIVE)
+        # Each streamed chunk holds the next piece of the reply in
+        # chunk['message']['content']
+        parts = []
+        async for chunk in stream:
+            piece = chunk['message']['content']
+            parts.append(piece)
+            if out is not None:
+                out.write(piece)
+        content = "".join(parts)
     except Exception as e:
         logging.error(f"Error during AI generation: {e}")
-        return f"Error: {str(e)}"
+        return None
+
+    if LLM_CACHE_ENABLED:
+        write_cached_post(desiredModel, prompt, content)
+    return content
 
 # ------------------------------------------------------------------------------
-# 4. Main function to process a single company
+# 4. Prompts
 # ------------------------------------------------------------------------------
-def process_company(company_name, website_url, model_name="llama3.1:latest"):
-    """
-    1) Extract text from the website.
-    2) Calls the LLM 4 times for 4 social networks (Facebook, LinkedIn, X, Instagram).
-    3) Saves the results in a text file named with the company name and date.
-    4) Returns a short success/failure message to display in Gradio.
-    """
-    logging.info(f"Processing {company_name} ({website_url})")
-
-    # Extract text
-    homepage_text = extract_text_from_url(website_url)
-    if not homepage_text:
-        msg = f"Skipping {company_name} due to text extraction error."
-        logging.warning(msg)
-        return msg
-
-    # Brand guide + TMSA context
-    tmsa_brand_guide = """\
+# Each prompt starts with a static prefix (brand guide + coordinator context)
+# that is byte-identical for every call and every company, followed by the
+# company-specific part. Ollama reuses its KV cache for a matching prompt
+# prefix, so the prefix only has to be evaluated once.
+TMSA_BRAND_GUIDE = """\
 TMSA Brand Guide (Summary):
 - Mission: Empower marketing and sales professionals in transportation and logistics
 - Tone: Professional, approachable, industry-specific, inspirational, collaborative
 - Goal: Highlight TMSA member companies, build thought leadership, foster community
 """
 
-    # Truncate homepage text to avoid overly long prompts (optional)
-    shortened_homepage_context = homepage_text[:1500]
-
-    # --------------------------------------------------------------------------
-    # 4.1 Generate the Facebook post
-    # --------------------------------------------------------------------------
-    facebook_coordinator_context = """\
+FACEBOOK_COORDINATOR_CONTEXT = """\
 As the Facebook Coordinator for TMSA, you are adept at creating engaging Facebook posts that drive engagement.
 You're focused on fostering a sense of community and maximizing engagement on Facebook.
 Use short sentences. Each post should be between 50 to 150 words, with high perplexity and burstiness.
 Write one-sentence paragraphs. Include a call to action that encourages community interaction.
 Include 3 to 5 hashtags, and 1 to 5 emojis.
 """
+FACEBOOK_PREFIX = f"{TMSA_BRAND_GUIDE}\n{FACEBOOK_COORDINATOR_CONTEXT}\n\n"
 
-    facebook_prompt = f"""\
-{tmsa_brand_guide}
-{facebook_coordinator_context}
-
-Company: {company_name}
-Homepage snippet: {shortened_homepage_context}
-
-Task: Write an engaging Facebook post (50-150 words) featuring {company_name}, a member of TMSA.
-Make sure it aligns with TMSA's branding guidelines and fosters a sense of community on Facebook.
-"""
-
-    logging.info(f"Generating Facebook post for {company_name}...")
-    facebook_post = generate_post(model_name, facebook_prompt)
-
-    # --------------------------------------------------------------------------
-    # 4.2 Generate the LinkedIn post
-    # --------------------------------------------------------------------------
-    linkedin_coordinator_context = """\
+LINKEDIN_COORDINATOR_CONTEXT = """\
 As the LinkedIn Coordinator for TMSA, you specialize in crafting professional posts that resonate with a business audience.
 Length: 100-150 words. Use short sentences. Write with high perplexity and burstiness.
 One-sentence paragraphs. Include a call to action for engagement or traffic.
 Include 3 to 5 hashtags, and 1 to 5 emojis.
 Ensure professional tone and alignment with TMSA branding.
 """
+LINKEDIN_PREFIX = f"{TMSA_BRAND_GUIDE}\n{LINKEDIN_COORDINATOR_CONTEXT}\n\n"
 
-    linkedin_prompt = f"""\
-{tmsa_brand_guide}
-{linkedin_coordinator_context}
-
-Company: {company_name}
-Homepage snippet: {shortened_homepage_context}
-
-Task: Write a professional LinkedIn post (100-150 words) featuring {company_name}, a member of TMSA.
-Adhere to TMSA's brand guidelines, using SEO keywords and a call to action.
-"""
-
-    logging.info(f"Generating LinkedIn post for {company_name}...")
-    linkedin_post = generate_post(model_name, linkedin_prompt)
-
-    # --------------------------------------------------------------------------
-    # 4.3 Generate the X (Twitter) post
-    # --------------------------------------------------------------------------
-    x_coordinator_context = """\
+X_COORDINATOR_CONTEXT = """\
 As the X Coordinator for TMSA, you craft concise tweets that spark engagement.
 35 words max, under 280 characters.
 Include relevant hashtags and a call to action.
 Tone: informal and conversational.
 """
+X_PREFIX = f"{TMSA_BRAND_GUIDE}\n{X_COORDINATOR_CONTEXT}\n\n"
 
-    x_prompt = f"""\
-{tmsa_brand_guide}
-{x_coordinator_context}
+INSTAGRAM_COORDINATOR_CONTEXT = """\
+As the Instagram Coordinator for TMSA, you focus on visual storytelling to drive engagement.
+Create a visually engaging caption that aligns with TMSA's brand identity.
+Include a compelling CTA and maintain a brand-consistent style.
+Consider typical Instagram dimensions and best practices.
+"""
+INSTAGRAM_PREFIX = f"{TMSA_BRAND_GUIDE}\n{INSTAGRAM_COORDINATOR_CONTEXT}\n\n"
+
+# Section headers the combined prompt asks the model to emit, one per post.
+# They are the same headers used in the output file.
+POST_HEADERS = {
+    'facebook': "=== FACEBOOK POST ===",
+    'linkedin': "=== LINKEDIN POST ===",
+    'x': "=== X (TWITTER) POST ===",
+    'instagram': "=== INSTAGRAM POST ===",
+}
+# Models often wrap the header in markdown ("**=== FACEBOOK POST ===**",
+# "### === FACEBOOK POST ==="), so '*', '#' and whitespace around it are allowed.
+POST_HEADER_RE = re.compile(
+    r"^[ \t*#]*(" + "|".join(re.escape(h) for h in POST_HEADERS.values()) + r")[ \t*#]*$",
+    flags=re.M,
+)
 
-Company: {company_name}
-Homepage snippet: {shortened_homepage_context}
+# Prefix for the single prompt that asks for all four posts at once, so the
+# brand guide and company snippet are only evaluated once per company.
+COMBINED_PREFIX = (
+    f"{TMSA_BRAND_GUIDE}\n"
+    f"{FACEBOOK_COORDINATOR_CONTEXT}\n"
+    f"{LINKEDIN_COORDINATOR_CONTEXT}\n"
+    f"{X_COORDINATOR_CONTEXT}\n"
+    f"{INSTAGRAM_COORDINATOR_CONTEXT}\n"
+)
 
-Task: Write a short, impactful tweet (max 35 words) featuring {company_name}, a TMSA member.
-Include at least one relevant hashtag, a call to action, and ensure it fits X's character limits.
+# Full prompt templates: static prefix + company-specific part, with {name}
+# and {snippet} placeholders filled in by `str.format_map` for each company.
+COMBINED_TEMPLATE = COMBINED_PREFIX + """\
+Company: {name}
+Homepage snippet: {snippet}
+
+Task: Write four posts featuring {name}, a member of TMSA, one for each coordinator above:
+- An engaging Facebook post (50-150 words) that fosters a sense of community on Facebook.
+- A professional LinkedIn post (100-150 words) using SEO keywords and a call to action.
+- A short, impactful tweet (max 35 words) with at least one relevant hashtag and a call to action, fitting X's character limits.
+- An Instagram caption with a visually descriptive, upbeat tone, ending with a CTA for followers to engage.
+Make sure every post aligns with TMSA's branding guidelines.
+Write nothing before the first header or after the last post.
+Start each post with its header on a line of its own, exactly as written and in this order:
+""" + "\n".join(POST_HEADERS.values()) + "\n"
+
+FACEBOOK_TEMPLATE = FACEBOOK_PREFIX + """\
+Company: {name}
+Homepage snippet: {snippet}
+
+Task: Write an engaging Facebook post (50-150 words) featuring {name}, a member of TMSA.
+Make sure it aligns with TMSA's branding guidelines and fosters a sense of community on Facebook.
 """
 
-    logging.info(f"Generating X (Twitter) post for {company_name}...")
-    x_post = generate_post(model_name, x_prompt)
+LINKEDIN_TEMPLATE = LINKEDIN_PREFIX + """\
+Company: {name}
+Homepage snippet: {snippet}
 
-    # --------------------------------------------------------------------------
-    # 4.4 Generate the Instagram post
-    # --------------------------------------------------------------------------
-    instagram_coordinator_context = """\
-As the Instagram Coordinator for TMSA, you focus on visual storytelling to drive engagement.
-Create a visually engaging caption that aligns with TMSA's brand identity.
-Include a compelling CTA and maintain a brand-consistent style.
-Consider typical Instagram dimensions and best practices.
+Task: Write a professional LinkedIn post (100-150 words) featuring {name}, a member of TMSA.
+Adhere to TMSA's brand guidelines, using SEO keywords and a call to action.
 """
 
-    instagram_prompt = f"""\
-{tmsa_brand_guide}
-{instagram_coordinator_context}
+X_TEMPLATE = X_PREFIX + """\
+Company: {name}
+Homepage snippet: {snippet}
+
+Task: Write a short, impactful tweet (max 35 words) featuring {name}, a TMSA member.
+Include at least one relevant hashtag, a call to action, and ensure it fits X's character limits.
+"""
 
-Company: {company_name}
-Homepage snippet: {shortened_homepage_context}
+INSTAGRAM_TEMPLATE = INSTAGRAM_PREFIX + """\
+Company: {name}
+Homepage snippet: {snippet}
 
-Task: Write an Instagram caption that highlights {company_name}, a TMSA member.
+Task: Write an Instagram caption that highlights {name}, a TMSA member.
 Use a visually descriptive, upbeat tone, and end with a CTA for followers to engage.
 """
 
-    logging.info(f"Generating Instagram post for {company_name}...")
-    instagram_post = generate_post(model_name, instagram_prompt)
+def split_combined_reply(text):
+    """
+    Splits a combined reply into its posts using POST_HEADERS.
+    Returns a dict keyed like POST_HEADERS holding only the sections that are present and non-empty.
+    """
+    # re.split with a capture group yields [preamble, header, body, header, body, ...]
+    pieces = POST_HEADER_RE.split(text)
+    sections = {header: body.strip() for header, body in zip(pieces[1::2], pieces[2::2])}
+    return {
+        key: sections[header]
+        for key, header in POST_HEADERS.items()
+        if sections.get(header)
+    }
 
-    # --------------------------------------------------------------------------
-    # 4.5 Save all posts to a file
-    # --------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+# 5. Main function to process a single company
+# ------------------------------------------------------------------------------
+# Posts are saved in the 'output' folder, created once at startup
+os.makedirs("output", exist_ok=True)
+
+# Filenames keep only letters, digits, spaces, '-' and '_'. ASCII names are
+# cleaned with a precomputed `str.translate` table; anything else goes
+# through the equivalent Unicode-aware regex.
+_FILENAME_KEEP = set(string.ascii_letters + string.digits + " -_")
+_FILENAME_TRANS = str.maketrans(
+    "", "", "".join(chr(i) for i in range(128) if chr(i) not in _FILENAME_KEEP)
+)
+_FILENAME_UNSAFE_RE = re.compile(r"[^\w \-]")
+
+def safe_filename(name):
+    """
+    Returns `name` with every character unsafe for a filename removed.
+    """
+    if name.isascii():
+        return name.translate(_FILENAME_TRANS).strip()
+    return _FILENAME_UNSAFE_RE.sub("", name).strip()
+
+def output_file_path(company_name, taken=None):
+    """
+    Returns the output path for a company: output/{CompanyName_YYYYMMDD}.txt.
+    If the path is already in the `taken` set (e.g. two names that clean up to
+    the same filename in one batch), a numeric suffix is added; the returned
+    path is then added to `taken`.
+    """
     date_stamp = datetime.datetime.now().strftime("%Y%m%d")
     # Clean up the company name for a safer filename
-    safe_company_name = "".join(
-        char for char in company_name if char.isalnum() or char in (" ", "-", "_")
-    ).strip()
-    filename = f"{safe_company_name}_{date_stamp}.txt"
+    base = f"{safe_filename(company_name)}_{date_stamp}"
+    file_path = os.path.join("output", f"{base}.txt")
+    if taken is not None:
+        n = 2
+        while file_path in taken:
+            file_path = os.path.join("output", f"{base}_{n}.txt")
+            n += 1
+        taken.add(file_path)
+    return file_path
+
+def fail_company(company_name, file_path):
+    """
+    Removes the partially streamed output file and returns the failure message for Gradio.
+    """
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+    err_msg = f"Failed to generate posts for {company_name}; see the log for details."
+    logging.error(err_msg)
+    return err_msg
+
+async def process_company(company_name, website_url, model_name="llama3.1:latest", file_path=None):
+    """
+    1) Extract text from the website.
+    2) Calls the LLM once for posts on 4 social networks (Facebook, LinkedIn, X, Instagram).
+       Any post missing from the reply is generated with its own per-network call, concurrently.
+    3) Saves the results in `file_path`, by default a text file named with the company name and date.
+    4) Returns a short success/failure message to display in Gradio.
+    """
+    logging.info(f"Processing {company_name} ({website_url})")
+
+    # Extract text (blocking I/O, so keep it off the event loop), truncated to
+    # avoid overly long prompts
+    homepage_text = await asyncio.to_thread(
+        extract_text_from_url, website_url, max_chars=HOMEPAGE_CONTEXT_CHARS
+    )
+    if not homepage_text:
+        msg = f"Skipping {company_name} due to text extraction error."
+        logging.warning(msg)
+        return msg
+
+    # --------------------------------------------------------------------------
+    # 5.1 Output file
+    # --------------------------------------------------------------------------
+    if file_path is None:
+        file_path = output_file_path(company_name)
+
+    # --------------------------------------------------------------------------
+    # 5.2 Generate all four posts in a single call
+    # --------------------------------------------------------------------------
+    prompt_fields = {'name': company_name, 'snippet': homepage_text}
+    combined_prompt = COMBINED_TEMPLATE.format_map(prompt_fields)
+
+    # The reply is streamed into the file (line-buffered) so it fills in as
+    # the model writes; the file is rewritten from the parsed posts below.
+    logging.info(f"Generating Facebook, LinkedIn, X (Twitter) and Instagram posts for {company_name}...")
+    try:
+        with open(file_path, "w", encoding="utf-8", buffering=1) as f:
+            f.write(f"Company: {company_name}\nWebsite: {website_url}\n\n")
+            combined_reply = await generate_post_async(OLLAMA_CLIENT, model_name, combined_prompt, out=f)
+            f.write("\n\n")
+    except Exception as e:
+        err_msg = f"Failed to write file for {company_name}: {e}"
+        logging.error(err_msg)
+        return err_msg
 
-    if not os.path.exists("output"):
-        os.makedirs("output")
+    # A failed request means the server is unreachable or erroring, so don't
+    # send it four more requests; report the company as failed instead
+    if combined_reply is None:
+        return fail_company(company_name, file_path)
 
-    file_path = os.path.join("output", filename)
+    # --------------------------------------------------------------------------
+    # 5.3 Generate any missing post with its own call (static prefix + company-specific part)
+    # --------------------------------------------------------------------------
+    posts = split_combined_reply(combined_reply)
+    missing = [key for key in POST_HEADERS if key not in posts]
+    if missing:
+        logging.warning(
+            f"Combined reply for {company_name} is missing {', '.join(missing)}; generating those posts separately..."
+        )
+        templates = {
+            'facebook': FACEBOOK_TEMPLATE,
+            'linkedin': LINKEDIN_TEMPLATE,
+            'x': X_TEMPLATE,
+            'instagram': INSTAGRAM_TEMPLATE,
+        }
+        replies = await asyncio.gather(
+            *[generate_post_async(OLLAMA_CLIENT, model_name, templates[key].format_map(prompt_fields))
+              for key in missing]
+        )
+        if any(reply is None for reply in replies):
+            return fail_company(company_name, file_path)
+        posts.update(zip(missing, replies))
 
+    # --------------------------------------------------------------------------
+    # 5.4 Save all posts to a file (replacing the raw streamed reply)
+    # --------------------------------------------------------------------------
+    # The streamed file only shows progress; it may hold a preamble or
+    # sign-off around the posts. Rewrite it with just the headers and posts.
+    # The document is only a few KB, so build it in memory and write it once
+    body = f"Company: {company_name}\nWebsite: {website_url}\n\n" + "".join(
+        f"{POST_HEADERS[key]}\n{posts[key]}\n\n" for key in POST_HEADERS
+    )
     try:
         with open(file_path, "w", encoding="utf-8") as f:
-            f.write(f"Company: {company_name}\n")
-            f.write(f"Website: {website_url}\n\n")
-            f.write("=== FACEBOOK POST ===\n")
-            f.write(facebook_post + "\n\n")
-            f.write("=== LINKEDIN POST ===\n")
-            f.write(linkedin_post + "\n\n")
-            f.write("=== X (TWITTER) POST ===\n")
-            f.write(x_post + "\n\n")
-            f.write("=== INSTAGRAM POST ===\n")
-            f.write(instagram_post + "\n\n")
+            f.write(body)
 
         msg = f"Successfully processed {company_name}. Posts saved to {file_path}"
         logging.info(msg)
@@ -238,52 +577,64 @@ Use a visually descriptive, upbeat tone, and end with a CTA for followers to eng
         return err_msg
 
 # ------------------------------------------------------------------------------
-# 5. Gradio Interface
+# 6. Gradio Interface
 # ------------------------------------------------------------------------------
-def run_app(
-    company1, website1,
-    company2, website2,
-    company3, website3,
-    company4, website4,
-    company5, website5,
-    company6, website6,
-    company7, website7,
-    company8, website8,
-    company9, website9,
-    company10, website10,
-    company11, website11,
-    company12, website12
-):
+async def process_company_async(sem, company_name, website_url, model_name, file_path):
+    """
+    Runs `process_company` once a slot in the semaphore is available.
+    """
+    async with sem:
+        return await process_company(
+            company_name, website_url, model_name=model_name, file_path=file_path
+        )
+
+async def run_app(companies):
     """
-    Collect up to 12 (company, website) pairs from Gradio inputs.
-    Run the sequential workflow for each non-empty entry.
+    Collect up to 12 (company, website) rows from the Gradio table.
+    Run the workflow for each non-empty entry.
     """
     results = []
     model_name = "llama3.1:latest"  # Update if needed
 
-    # Build list of pairs
-    pairs = [
-        (company1, website1),
-        (company2, website2),
-        (company3, website3),
-        (company4, website4),
-        (company5, website5),
-        (company6, website6),
-        (company7, website7),
-        (company8, website8),
-        (company9, website9),
-        (company10, website10),
-        (company11, website11),
-        (company12, website12),
+    # The table can be resized, so rows may have fewer or more than two
+    # cells; blank cells may come through as None. Only the first two cells
+    # of each row are read.
+    rows = []
+    for row in companies or []:
+        cells = [str(cell or "").strip() for cell in list(row)[:2]] + ["", ""]
+        if cells[0] or cells[1]:
+            rows.append((cells[0], cells[1]))
+
+    # Keep no more than MAX_COMPANIES rows, and tell the user about the rest
+    if len(rows) > MAX_COMPANIES:
+        ignored = len(rows) - MAX_COMPANIES
+        msg = f"Ignored {ignored} row(s) beyond the first {MAX_COMPANIES}."
+        logging.warning(msg)
+        results.append(msg)
+        rows = rows[:MAX_COMPANIES]
+
+    # Keep only the complete pairs
+    valid_pairs = [(c_name, c_website) for (c_name, c_website) in rows if c_name and c_website]
+
+    # Give every pair its own output file, so concurrent tasks never write
+    # to the same path
+    taken_paths = set()
+    file_paths = [output_file_path(c_name, taken_paths) for (c_name, _) in valid_pairs]
+
+    # Process the pairs concurrently, at most MAX_CONCURRENT_COMPANIES at a time
+    sem = asyncio.Semaphore(MAX_CONCURRENT_COMPANIES)
+    tasks = [
+        process_company_async(sem, c_name, c_website, model_name, file_path)
+        for (c_name, c_website), file_path in zip(valid_pairs, file_paths)
     ]
-
-    # Process each pair if it's non-empty
-    for (c_name, c_website) in pairs:
-        c_name = c_name.strip()
-        c_website = c_website.strip()
-        if c_name and c_website:
-            result_msg = process_company(c_name, c_website, model_name=model_name)
-            results.append(result_msg)
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    for (c_name, _), outcome in zip(valid_pairs, outcomes):
+        if isinstance(outcome, Exception):
+            err_msg = f"Failed to process {c_name}: {outcome}"
+            logging.error(err_msg)
+            results.append(err_msg)
+        else:
+            results.append(outcome)
 
     # Return a combined message
     if results:
@@ -292,7 +643,7 @@ def run_app(
         return "No valid company/website entries provided."
 
 # ------------------------------------------------------------------------------
-# 6. Build and Launch Gradio App
+# 7. Build and Launch Gradio App
 # ------------------------------------------------------------------------------
 with gr.Blocks() as demo:
     gr.Markdown("# TMSA Spotlight")
@@ -302,43 +653,16 @@ with gr.Blocks() as demo:
         "and save them to a text file in the 'output' folder."
     )
 
-    # We create 12 rows for the user to input data
-    with gr.Row():
-        company1 = gr.Textbox(label="Company Name 1")
-        website1 = gr.Textbox(label="Website URL 1")
-    with gr.Row():
-        company2 = gr.Textbox(label="Company Name 2")
-        website2 = gr.Textbox(label="Website URL 2")
-    with gr.Row():
-        company3 = gr.Textbox(label="Company Name 3")
-        website3 = gr.Textbox(label="Website URL 3")
-    with gr.Row():
-        company4 = gr.Textbox(label="Company Name 4")
-        website4 = gr.Textbox(label="Website URL 4")
-    with gr.Row():
-        company5 = gr.Textbox(label="Company Name 5")
-        website5 = gr.Textbox(label="Website URL 5")
-    with gr.Row():
-        company6 = gr.Textbox(label="Company Name 6")
-        website6 = gr.Textbox(label="Website URL 6")
-    with gr.Row():
-        company7 = gr.Textbox(label="Company Name 7")
-        website7 = gr.Textbox(label="Website URL 7")
-    with gr.Row():
-        company8 = gr.Textbox(label="Company Name 8")
-        website8 = gr.Textbox(label="Website URL 8")
-    with gr.Row():
-        company9 = gr.Textbox(label="Company Name 9")
-        website9 = gr.Textbox(label="Website URL 9")
-    with gr.Row():
-        company10 = gr.Textbox(label="Company Name 10")
-        website10 = gr.Textbox(label="Website URL 10")
-    with gr.Row():
-        company11 = gr.Textbox(label="Company Name 11")
-        website11 = gr.Textbox(label="Website URL 11")
-    with gr.Row():
-        company12 = gr.Textbox(label="Company Name 12")
-        website12 = gr.Textbox(label="Website URL 12")
+    # A single table holds the (Company Name, Website URL) rows
+    companies = gr.Dataframe(
+        headers=["Company Name", "Website URL"],
+        value=[["", ""] for _ in range(MAX_COMPANIES)],
+        row_count=MAX_COMPANIES,
+        column_count=2,
+        datatype="str",
+        type="array",
+        interactive=True,
+    )
 
     run_button = gr.Button("Generate Posts")
     output_area = gr.Textbox(
@@ -349,20 +673,7 @@ with gr.Blocks() as demo:
 
     run_button.click(
         fn=run_app,
-        inputs=[
-            company1, website1,
-            company2, website2,
-            company3, website3,
-            company4, website4,
-            company5, website5,
-            company6, website6,
-            company7, website7,
-            company8, website8,
-            company9, website9,
-            company10, website10,
-            company11, website11,
-            company12, website12,
-        ],
+        inputs=[companies],
         outputs=[output_area]
     )
 